@@ -1,17 +1,305 @@
 # Importa os módulos necessários para operações HTTP, manipulação de JSON e
 # processamento de dados em formato de planilha.
 
-# Módulo para realizar solicitações HTTP e HTTPS a servidores web.
-import http.client
+# Biblioteca para realizar solicitações HTTP e HTTPS a servidores web,
+# com suporte a sessões que reaproveitam conexões (keep-alive).
+import requests
 
-# Módulo para codificar e decodificar dados em formato JSON, uma forma
-# leve de troca de dados.
-import json
+# Extensão do requests que armazena as respostas em um cache persistente,
+# evitando repetir consultas já feitas em execuções anteriores.
+import requests_cache
+
+# Adaptador de transporte do requests, que permite configurar o pool de
+# conexões e a política de novas tentativas.
+from requests.adapters import HTTPAdapter
+
+# Função para interpretar datas no formato usado em cabeçalhos HTTP, como 'Retry-After'.
+from email.utils import parsedate_to_datetime
+
+# Biblioteca para decodificar e codificar dados em formato JSON, implementada
+# em C e mais rápida que o módulo 'json' da biblioteca padrão.
+import orjson
+
+# Módulo de registro de mensagens (logs), usado para acompanhar o processamento
+# sem escrever diretamente no terminal a cada CNPJ.
+import logging
+
+# Módulo para interagir com o sistema operacional, usado aqui para remover
+# o arquivo de resultados parciais ao final do processamento.
+import os
+
+# Módulo de expressões regulares, usado para limpar os CNPJs.
+import re
+
+# Módulo para medir o tempo e aguardar intervalos, usado no controle da taxa
+# de requisições à API.
+import time
+
+# Módulo para controlar o acesso concorrente a recursos compartilhados
+# entre várias threads.
+import threading
+
+# Executor que distribui chamadas de função entre um conjunto de threads,
+# e 'as_completed', que entrega os resultados à medida que ficam prontos.
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Biblioteca que oferece estruturas de dados e ferramentas de análise de
 # dados, útil para manipular tabelas.
 import pandas as pd
 
+# Biblioteca para manipular dados em formato colunar (Apache Arrow) e gravá-los
+# em arquivos Parquet, um formato compacto e tipado, rápido de ler e escrever.
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Biblioteca que exibe uma barra de progresso no terminal, e função que
+# direciona as mensagens de log para que não desorganizem a barra.
+from tqdm import tqdm
+from tqdm.contrib.logging import logging_redirect_tqdm
+
+# Registrador de mensagens deste módulo.
+# Diferentemente de 'print', as mensagens de log podem ser emitidas pelas várias
+        # threads sem disputar a escrita no terminal, e o nível de detalhe pode ser
+        # ajustado sem alterar o código.
+logger = logging.getLogger(__name__)
+
+# Número máximo de consultas simultâneas à API.
+# Este valor define o tamanho do conjunto de threads e o tamanho do pool de
+        # conexões da sessão. Ele não controla quantas requisições são feitas
+        # por minuto; isso é definido por 'REQUISICOES_POR_MINUTO'.
+MAX_REQUISICOES_SIMULTANEAS = 8
+
+# Número máximo de requisições enviadas à API por minuto.
+# Deve ser ajustado ao limite do plano contratado na ReceitaWS; o plano
+        # gratuito permite 3 consultas por minuto.
+# O limite vale para cada tentativa enviada, inclusive as novas tentativas feitas
+        # após respostas transitórias (ver 'AdaptadorComLimite').
+# Respostas lidas do cache não são requisições à API e não contam para este limite.
+REQUISICOES_POR_MINUTO = 3
+
+# Intervalo mínimo, em segundos, entre o envio de duas requisições à API.
+_INTERVALO_ENTRE_REQUISICOES = 60 / REQUISICOES_POR_MINUTO
+
+# Trava que protege o horário da próxima requisição permitida, compartilhado
+        # por todas as threads.
+_TRAVA_LIMITE = threading.Lock()
+
+# Horário (em segundos de 'time.monotonic') a partir do qual a próxima
+        # requisição pode ser enviada.
+_proximo_horario_livre = 0.0
+
+# Evento sinalizado quando a execução é interrompida, para que as threads que
+        # aguardam a vez na API desistam da espera em vez de bloquear o encerramento.
+ENCERRANDO = threading.Event()
+
+# Função que monta a URL de consulta de um CNPJ na API ReceitaWS.
+# O método 'format' do modelo é obtido uma única vez, no nível do módulo, e
+        # apenas insere o CNPJ no lugar de '{}' a cada chamada.
+URL_CNPJ = "https://www.receitaws.com.br/v1/cnpj/{}".format
+
+def resposta_pode_ir_para_cache(resposta):
+    
+    """
+    Esta função decide se uma resposta da API pode ser guardada no cache 
+                da sessão. Apenas respostas com os dados de uma empresa são 
+                guardadas; erros informados pela API e corpos que não são 
+                JSON (como uma página de manutenção) não são, para que sejam 
+                consultados novamente na próxima execução.
+
+    Parâmetros:
+    resposta (Response): Resposta HTTP recebida da API.
+
+    Retorna:
+    bool: True se a resposta puder ser guardada no cache; False caso contrário.
+    """
+    
+    # Tenta decodificar o corpo da resposta; se não for um JSON válido, a resposta
+                # não é guardada.
+    try:
+        empresa = orjson.loads(resposta.content)
+    except orjson.JSONDecodeError:
+        return False
+    
+    # Respostas com 'status' igual a 'ERROR' indicam um erro na busca de dados
+                # e também não são guardadas.
+    return not (isinstance(empresa, dict) and empresa.get("status") == "ERROR")
+
+
+# Sessão HTTP compartilhada por todas as consultas à API.
+# Em vez de abrir uma nova conexão TLS para cada CNPJ (pagando o custo do
+        # handshake TCP+TLS a cada chamada), a sessão mantém as conexões
+        # abertas e as reaproveita entre as requisições.
+# A sessão também guarda as respostas em um banco SQLite local
+        # ('receitaws_cache.sqlite') por 7 dias. Assim, CNPJs repetidos na
+        # planilha ou já consultados em execuções anteriores são lidos do
+        # disco, sem uma nova requisição à API.
+# 'filter_fn' impede que respostas de erro fiquem no cache e sejam repetidas
+        # em todas as execuções durante esse período.
+SESSION = requests_cache.CachedSession(
+    'receitaws_cache',
+    backend='sqlite',
+    expire_after=86400 * 7,
+    filter_fn=resposta_pode_ir_para_cache,
+)
+
+# Número máximo de novas tentativas para uma mesma consulta, em caso de respostas
+        # transitórias (limite de requisições e erros do servidor) ou falhas de
+        # rede, evitando que uma falha momentânea descarte o CNPJ e obrigue a
+        # repetir toda a execução.
+NOVAS_TENTATIVAS = 5
+
+# Códigos de status HTTP considerados transitórios, que justificam uma nova tentativa.
+STATUS_TRANSITORIOS = frozenset({429, 500, 502, 503, 504})
+
+# Intervalo, em segundos, antes da primeira nova tentativa. O intervalo dobra a
+        # cada nova tentativa (1s, 2s, 4s, 8s, 16s), e nunca é menor que o tempo
+        # pedido pela API no cabeçalho 'Retry-After'.
+INTERVALO_BASE_NOVAS_TENTATIVAS = 1.0
+
+def aguardar_vez_na_api():
+    
+    """
+    Esta função bloqueia a thread chamadora até que seja permitido enviar 
+                uma nova requisição à API, respeitando o intervalo mínimo 
+                definido por 'REQUISICOES_POR_MINUTO'.
+    Cada chamada reserva o próximo horário livre, de modo que as threads 
+                são atendidas uma após a outra, espaçadas pelo intervalo.
+
+    Retorno:
+    None: A função apenas aguarda o tempo necessário. Se a execução for 
+                interrompida durante a espera, levanta 'requests.ConnectionError'.
+    """
+    
+    global _proximo_horario_livre
+    
+    # Sob a trava, reserva o primeiro horário livre (agora, se nenhuma requisição
+                # estiver agendada) e avança o próximo horário livre em um intervalo.
+    # A espera em si é feita fora da trava, para que outras threads possam
+                # reservar seus horários enquanto esta aguarda.
+    with _TRAVA_LIMITE:
+        agora = time.monotonic()
+        horario = max(agora, _proximo_horario_livre)
+        _proximo_horario_livre = horario + _INTERVALO_ENTRE_REQUISICOES
+    
+    # Aguarda até o horário reservado, ou até que a execução seja interrompida.
+    # Nesse caso, a requisição não é enviada e um erro de conexão é sinalizado,
+                # tratado por 'obter_dados_empresa_por_cnpj' como uma consulta com falha.
+    if ENCERRANDO.wait(horario - agora):
+        raise requests.ConnectionError("Execução interrompida antes do envio da requisição")
+
+
+def segundos_retry_after(resposta):
+    
+    """
+    Esta função lê o cabeçalho 'Retry-After' de uma resposta HTTP, usado pela 
+                API para informar quanto tempo aguardar antes de uma nova requisição.
+
+    Parâmetros:
+    resposta (Response): Resposta HTTP recebida da API.
+
+    Retorna:
+    float: Número de segundos a aguardar, ou 0 se o cabeçalho estiver 
+                ausente ou não puder ser interpretado.
+    """
+    
+    valor = resposta.headers.get('Retry-After')
+    if not valor:
+        return 0.0
+    
+    # O cabeçalho pode conter um número de segundos ou uma data HTTP.
+    try:
+        return max(0.0, float(valor))
+    except ValueError:
+        pass
+    
+    try:
+        data = parsedate_to_datetime(valor)
+    except (TypeError, ValueError):
+        return 0.0
+    return max(0.0, data.timestamp() - time.time())
+
+
+class AdaptadorComLimite(HTTPAdapter):
+    
+    """
+    Adaptador de transporte que aguarda a vez na API (ver 'aguardar_vez_na_api') 
+                antes de enviar cada tentativa de requisição, inclusive as 
+                novas tentativas após respostas transitórias ou falhas de rede.
+    Assim, 'REQUISICOES_POR_MINUTO' é respeitado mesmo quando a API responde 
+                com erros e as consultas precisam ser repetidas.
+    Como a sessão com cache só chama o adaptador quando a resposta não está 
+                no cache, as respostas lidas do disco não aguardam nem 
+                consomem o limite de requisições.
+    """
+    
+    def send(self, request, **kwargs):
+        
+        for tentativa in range(NOVAS_TENTATIVAS + 1):
+            
+            # Cada tentativa, inclusive as novas tentativas, reserva um horário no limite de requisições.
+            aguardar_vez_na_api()
+            
+            # Apenas requisições GET, que podem ser repetidas com segurança, são tentadas novamente.
+            ultima_tentativa = tentativa == NOVAS_TENTATIVAS or request.method != 'GET'
+            
+            # O intervalo até a próxima tentativa dobra a cada tentativa, a partir de
+                        # 'INTERVALO_BASE_NOVAS_TENTATIVAS'.
+            espera = INTERVALO_BASE_NOVAS_TENTATIVAS * 2 ** tentativa
+            
+            try:
+                resposta = super().send(request, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                
+                # Falhas de rede são repassadas na última tentativa; antes disso,
+                            # a consulta é repetida após o intervalo.
+                if ultima_tentativa:
+                    raise
+            else:
+                
+                # Respostas que não são transitórias, ou a resposta da última tentativa,
+                            # são devolvidas para que o status seja tratado pela
+                            # própria função de consulta.
+                if ultima_tentativa or resposta.status_code not in STATUS_TRANSITORIOS:
+                    return resposta
+                
+                # Em respostas transitórias, respeita o tempo pedido no cabeçalho
+                            # 'Retry-After', se for maior que o intervalo calculado,
+                            # e libera a conexão antes da nova tentativa.
+                espera = max(espera, segundos_retry_after(resposta))
+                resposta.close()
+            
+            # Aguarda o intervalo antes da nova tentativa. A espera é interrompida se a
+                        # execução for encerrada (por exemplo, com Ctrl+C), caso em que
+                        # um erro de conexão é sinalizado, como em 'aguardar_vez_na_api'.
+            if ENCERRANDO.wait(espera):
+                raise requests.ConnectionError("Execução interrompida antes de uma nova tentativa")
+
+
+# Monta um adaptador para o prefixo 'https://' com um pool de conexões para o
+        # único host consultado, o controle da taxa de requisições e as novas
+        # tentativas feitas pelo próprio adaptador.
+# As novas tentativas automáticas do urllib3 ficam desativadas (padrão do adaptador),
+        # pois seriam enviadas sem passar pelo limite de requisições.
+SESSION.mount("https://", AdaptadorComLimite(
+    pool_connections=1,
+    pool_maxsize=MAX_REQUISICOES_SIMULTANEAS,
+))
+
+# Campos específicos que são de interesse para a aplicação ou o processo de
+        # negócio, na ordem em que são gravados na tabela de resultados.
+# Esses campos foram escolhidos porque são comuns em consultas de
+        # dados de empresas e úteis para análises básicas ou contato.
+# A tupla é definida uma única vez, no nível do módulo, em vez de ser recriada
+        # a cada chamada de 'formatar_dados'. Informá-la explicitamente ao
+        # construir o DataFrame evita que o pandas precise percorrer todos os
+        # dicionários para descobrir o conjunto de colunas.
+CAMPOS_INTERESSE = ('cnpj', 'nome', 'telefone', 'email', 'logradouro', 'bairro', 'municipio', 'uf', 'cep', 'atividade_principal')
+
+# Expressão regular pré-compilada que reconhece qualquer caractere que não seja
+        # um dígito numérico. Compilá-la uma única vez evita refazer esse
+        # trabalho a cada CNPJ limpo.
+_NAO_DIGITO = re.compile(r'\D')
+
 def limpar_cnpj(cnpj):
     
     """
@@ -30,20 +318,57 @@ def limpar_cnpj(cnpj):
             uso em URLs ou consultas de banco de dados.
     """
     
-    # A função `filter` é utilizada aqui para iterar sobre cada caractere da string 'cnpj'.
-    # A função `str.isdigit` é passada como argumento para `filter`, que aplica esta
-            # função a cada caractere.
-    # `str.isdigit` retorna True se o caractere for um dígito numérico, o que significa
-            # que ele é retido na sequência final.
-    # Caso contrário, caracteres como pontos, traços e espaços, que retornariam False,
-            # são removidos da sequência final.
-    # O resultado de `filter`, que é um iterador sobre os caracteres que são dígitos, é
-            # convertido de volta em uma string usando `join`.
-    # A função `join` é chamada em uma string vazia '', que serve como separador entre os
-            # caracteres no resultado final.
-    # Isso significa que todos os caracteres numéricos são concatenados sem nenhum
-            # separador entre eles.
-    return ''.join(filter(str.isdigit, cnpj))
+    # O método `sub` da expressão regular '_NAO_DIGITO' substitui cada caractere
+            # que não é dígito numérico por uma string vazia ''.
+    # Caracteres como pontos, traços, barras e espaços são, portanto, removidos,
+            # e os dígitos permanecem na ordem original, sem nenhum separador entre eles.
+    # Toda a varredura é feita em uma única chamada ao mecanismo de expressões
+            # regulares, implementado em C, em vez de testar caractere a caractere em Python.
+    return _NAO_DIGITO.sub('', cnpj)
+
+
+# Pesos usados no cálculo dos dígitos verificadores do CNPJ.
+# O primeiro dígito verificador usa os 12 últimos pesos, e o segundo usa todos os 13.
+_PESOS_CNPJ = (6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2)
+
+def cnpj_valido(cnpj):
+    
+    """
+    Esta função verifica, sem consultar a API, se um CNPJ é válido, 
+                conferindo o tamanho e os dois dígitos verificadores 
+                calculados pelo algoritmo de módulo 11.
+    Isso permite descartar CNPJs obviamente inválidos antes de gastar 
+                uma requisição à API com eles.
+
+    Parâmetros:
+    cnpj (str): CNPJ já limpo, contendo apenas dígitos numéricos.
+
+    Retorna:
+    bool: True se o CNPJ tiver 14 dígitos e os dígitos verificadores 
+                estiverem corretos; False caso contrário.
+    """
+    
+    # Um CNPJ deve ter exatamente 14 dígitos numéricos.
+    # Sequências com todos os dígitos iguais (como '00000000000000') passam no
+            # cálculo dos dígitos verificadores, mas não são CNPJs válidos.
+    if len(cnpj) != 14 or not cnpj.isdigit() or cnpj == cnpj[0] * 14:
+        return False
+    
+    # Converte cada caractere do CNPJ em um número inteiro para o cálculo.
+    digitos = [int(digito) for digito in cnpj]
+    
+    # Calcula e confere os dois dígitos verificadores, nas posições 12 e 13.
+    # Para cada um, os dígitos anteriores são multiplicados pelos pesos
+            # correspondentes e somados; o dígito verificador é 0 se o resto da
+            # divisão da soma por 11 for menor que 2, e 11 menos o resto caso contrário.
+    for posicao in (12, 13):
+        soma = sum(digito * peso for digito, peso in zip(digitos, _PESOS_CNPJ[13 - posicao:]))
+        resto = soma % 11
+        if digitos[posicao] != (0 if resto < 2 else 11 - resto):
+            return False
+    
+    # Se os dois dígitos verificadores conferem, o CNPJ é válido.
+    return True
 
 
 def obter_dados_empresa_por_cnpj(cnpj):
@@ -51,12 +376,11 @@ def obter_dados_empresa_por_cnpj(cnpj):
     """
     Esta função faz uma consulta à API ReceitaWS para obter informações 
                 sobre uma empresa, usando o CNPJ como chave de pesquisa.
-    O processo envolve limpar o CNPJ para remover caracteres não numéricos, 
-                enviar uma requisição HTTP GET e interpretar a resposta.
+    O processo envolve enviar uma requisição HTTP GET e interpretar a resposta.
     
     Parâmetros:
-    cnpj (str): CNPJ da empresa a ser consultada, podendo inicialmente 
-                incluir caracteres como traços ou pontos.
+    cnpj (str): CNPJ da empresa a ser consultada, já limpo, contendo apenas 
+                os 14 dígitos numéricos (ver 'limpar_cnpj').
     
     Retorna:
     dict: Um dicionário contendo as informações da empresa recuperadas 
@@ -64,72 +388,60 @@ def obter_dados_empresa_por_cnpj(cnpj):
                 bem-sucedida ou problemas na decodificação do JSON.
     """
     
-    # Primeiro, a função 'limpar_cnpj' é chamada para remover quaisquer
-                # caracteres não numéricos do CNPJ fornecido.
-    # Isso é crucial porque a API espera um CNPJ apenas com dígitos numéricos.
-    cnpj = limpar_cnpj(cnpj)
-    
-    # Cria uma conexão HTTPS com o domínio 'www.receitaws.com.br'.
-    # O protocolo HTTPS é usado aqui para garantir a segurança dos dados
-    # transmitidos através da Internet.
-    conexao = http.client.HTTPSConnection("www.receitaws.com.br")
-    
-    # Envia uma requisição GET para o servidor da API, especificamente ao endpoint que
-            # aceita CNPJ como parâmetro.
+    # Envia uma requisição GET para o endpoint da API que aceita CNPJ como parâmetro,
+            # usando a sessão compartilhada 'SESSION', que reaproveita a conexão
+            # HTTPS já aberta com 'www.receitaws.com.br'.
     # O método `GET` é utilizado para recuperar dados do servidor sem afetar o estado
             # do mesmo, o que é ideal para consultas.
-    # A URL para a requisição é construída usando f-strings, que permite a inserção
-            # dinâmica de variáveis dentro de strings.
-    # O endpoint `/v1/cnpj/{cnpj}` é especificamente projetado para aceitar um CNPJ como parte da URL.
-    # Aqui, `{cnpj}` na URL é substituído pelo valor da variável `cnpj`, que contém
-            # o CNPJ da empresa a ser consultado.
-    # Este CNPJ é inserido diretamente na URL, seguindo as especificações da API, garantindo
-            # que o CNPJ correto seja utilizado na consulta.
-    # A função `request` do objeto `conexao`, que é uma instância de `http.client.HTTPSConnection`,
-            # é chamada com dois argumentos:
-    # o método HTTP 'GET' e a URL formatada.
-    # Esta chamada inicia o processo de envio da requisição HTTP ao servidor API, esperando por
-            # uma resposta que contém os dados da empresa.
-    conexao.request("GET", f"/v1/cnpj/{cnpj}")
-
-    
-    # Recebe a resposta do servidor após o envio da requisição.
-    # O objeto 'resposta' contém tanto o status do HTTP quanto o corpo da resposta.
-    resposta = conexao.getresponse()
-    
-    # Para fins de depuração e controle de fluxo, o status da resposta HTTP é impresso.
+    # O endpoint `/v1/cnpj/{cnpj}` é especificamente projetado para aceitar um CNPJ como parte da URL,
+            # que é montada pela função 'URL_CNPJ'.
+    # O parâmetro 'timeout' define 5 segundos para estabelecer a conexão e 30 segundos
+            # para receber a resposta, evitando que uma consulta fique travada indefinidamente.
+    # Falhas de rede (conexão recusada, tempo esgotado etc.) são capturadas para que
+            # um único CNPJ com problema não interrompa o processamento do lote.
+    # Se a resposta não estiver no cache, a requisição só é enviada quando o
+            # adaptador da sessão libera a vez, respeitando 'REQUISICOES_POR_MINUTO'.
+    try:
+        resposta = SESSION.get(URL_CNPJ(cnpj), timeout=(5, 30))
+    except requests.RequestException as erro:
+        
+        # Se a execução estiver sendo interrompida, a consulta foi cancelada de
+                    # propósito e não há o que registrar.
+        if not ENCERRANDO.is_set():
+            logger.warning("Erro de conexão ao buscar dados para o CNPJ %s: %s", cnpj, erro)
+        return None
+    
+    # Para fins de depuração e controle de fluxo, o status da resposta HTTP é registrado
+            # no nível DEBUG, que não é exibido por padrão.
     # Isso ajuda a verificar se a requisição foi bem-sucedida.
-    print(f"Processando CNPJ {cnpj}: Status {resposta.status}")
+    logger.debug("Processando CNPJ %s: Status %s", cnpj, resposta.status_code)
     
     # Verifica se o status HTTP da resposta não é 200 (OK).
     # Qualquer status diferente de 200 indica que algo deu errado com a
     # requisição, e a função então encerra prematuramente.
-    if resposta.status != 200:
-
-        # A conexão é fechada para liberar recursos.
-        conexao.close()
-
-        # A função retorna None para indicar que a requisição falhou.
+    # Não é necessário fechar a conexão: ela volta ao pool da sessão.
+    if resposta.status_code != 200:
+        logger.warning("Erro ao buscar dados para o CNPJ %s: Status %s", cnpj, resposta.status_code)
         return None  
     
-    # Se o status for 200, o conteúdo da resposta é lido.
-    # O método 'read' obtém o corpo da resposta, que é um conjunto de bytes.
-    dados = resposta.read()
-    
-    # Após a leitura dos dados, a conexão é fechada.
-    conexao.close()
-    
-    # Tenta decodificar os bytes para uma string formatada em UTF-8 e então
-            # carrega essa string como um dicionário JSON.
+    # Decodifica o corpo da resposta, formatado em JSON, como um dicionário Python.
     # Esse passo é crucial porque transforma a string JSON em um objeto Python
             # que pode ser facilmente manipulado.
-    empresa = json.loads(dados.decode("utf-8"))
+    # 'orjson.loads' recebe diretamente os bytes de 'resposta.content', dispensando
+            # a etapa de decodificação para texto feita por 'resposta.json()'.
+    # Se o corpo não for um JSON válido (por exemplo, uma página de manutenção em HTML),
+            # o erro é registrado e a função retorna None, sem interromper o lote.
+    try:
+        empresa = orjson.loads(resposta.content)
+    except orjson.JSONDecodeError as erro:
+        logger.warning("Resposta inválida ao buscar dados para o CNPJ %s: %s", cnpj, erro)
+        return None
     
     # Verifica se a resposta contém a chave 'status' com o valor 'ERROR', indicando um
             # erro na busca de dados.
-    # Se um erro é encontrado, uma mensagem correspondente é impressa e a função retorna None.
+    # Se um erro é encontrado, uma mensagem correspondente é registrada e a função retorna None.
     if "status" in empresa and empresa["status"] == "ERROR":
-        print(f"Erro ao buscar dados para o CNPJ {cnpj}: {empresa.get('message', 'Sem mensagem de erro')}")
+        logger.warning("Erro ao buscar dados para o CNPJ %s: %s", cnpj, empresa.get('message', 'Sem mensagem de erro'))
         return None
     
     # Se tudo ocorrer bem, o dicionário com as informações da empresa é retornado.
@@ -154,47 +466,75 @@ def formatar_dados(empresa):
                 formatados da empresa.
     """
     
-    # Lista de campos específicos que são de interesse para a
-                # aplicação ou o processo de negócio.
-    # Esses campos foram escolhidos porque são comuns em consultas de
-                # dados de empresas e úteis para análises básicas ou contato.
-    campos_interesse = ['cnpj', 'nome', 'telefone', 'email', 'logradouro', 'bairro', 'municipio', 'uf', 'cep', 'atividade_principal']
-    
-    # Cria um novo dicionário que irá conter apenas os campos especificados.
-    # Utiliza um dicionário por compreensão para iterar sobre a lista de campos de interesse.
-    # Para cada campo, o método `get` é utilizado para buscar o valor correspondente no
-            # dicionário original `empresa`.
+    # Associa o método `get` do dicionário `empresa` a uma variável local, evitando
+            # buscar o atributo `empresa.get` novamente para cada campo.
     # Se o campo não estiver presente no dicionário `empresa`, o método `get` retorna
             # uma string vazia como padrão (''),
     # o que ajuda a manter a consistência do dicionário de saída e evita erros de chave não encontrada.
-    dados_formatados = {campo: empresa.get(campo, '') for campo in campos_interesse}
+    g = empresa.get
     
-    # Verifica se a chave 'atividade_principal' está presente no dicionário e
-            # se ela contém algum valor.
     # A chave 'atividade_principal' geralmente contém uma lista de atividades, onde
             # cada atividade é um dicionário.
     # O interesse é extrair apenas o texto da primeira atividade principal listada, se disponível.
-    # Acessa o primeiro elemento da lista (índice [0]) e busca a chave 'text' dentro deste dicionário.
-    # Se a chave 'text' não estiver disponível, retorna uma string vazia como valor padrão.
-    if 'atividade_principal' in empresa and empresa['atividade_principal']:
-        dados_formatados['atividade_principal'] = empresa['atividade_principal'][0].get('text', '')
+    atividades = g('atividade_principal')
+    
+    # Cria diretamente o dicionário com os campos de 'CAMPOS_INTERESSE', na mesma ordem,
+            # sem a sobrecarga de um dicionário por compreensão.
+    # Para 'atividade_principal', acessa o primeiro elemento da lista (índice [0]) e busca
+            # a chave 'text' dentro deste dicionário; se a lista estiver ausente ou vazia,
+            # ou se a chave 'text' não estiver disponível, usa uma string vazia.
+    return {
+        'cnpj': g('cnpj', ''),
+        'nome': g('nome', ''),
+        'telefone': g('telefone', ''),
+        'email': g('email', ''),
+        'logradouro': g('logradouro', ''),
+        'bairro': g('bairro', ''),
+        'municipio': g('municipio', ''),
+        'uf': g('uf', ''),
+        'cep': g('cep', ''),
+        'atividade_principal': atividades[0].get('text', '') if atividades else '',
+    }
+
+
+def adicionar_resultado(resultados, posicoes, posicao, dados_formatados):
     
-    # Retorna o dicionário formatado contendo apenas os campos de interesse com seus
-            # valores extraídos ou padrões aplicados.
-    return dados_formatados
+    """
+    Esta função adiciona os dados formatados de uma empresa aos resultados 
+                organizados por coluna, com uma lista para cada campo de 
+                'CAMPOS_INTERESSE'.
+
+    Parâmetros:
+    resultados (dict): Dicionário que associa cada campo à lista de 
+                valores desse campo, uma posição por empresa.
+    posicoes (list): Lista com a posição, na planilha de entrada, de cada 
+                empresa adicionada, usada para reordenar os resultados ao final.
+    posicao (int): Posição do CNPJ da empresa na planilha de entrada.
+    dados_formatados (dict): Dados da empresa, como retornados por 'formatar_dados'.
+
+    Retorno:
+    None: A função altera 'resultados' e 'posicoes' diretamente.
+    """
+    
+    posicoes.append(posicao)
+    for campo, valores in resultados.items():
+        valores.append(dados_formatados[campo])
 
 
 def salvar_dados_empresa_excel(resultados, nome_arquivo, nome_aba="Dados"):
     
     """
     Esta função utiliza a biblioteca pandas para salvar um DataFrame de 
-                dados das empresas em uma planilha Excel existente.
-    Ela pode adicionar dados em uma aba existente ou criar uma 
-                nova aba se necessário.
+                dados das empresas em uma planilha Excel.
+    Se o arquivo já possuir a aba informada, os novos dados são 
+                adicionados após os dados existentes; caso contrário, 
+                a aba é criada.
+    O arquivo é sempre regravado por inteiro, em uma única escrita, 
+                usando o mecanismo 'xlsxwriter'.
 
     Parâmetros:
     resultados (DataFrame): DataFrame contendo os dados das empresas a serem salvos.
-                nome_arquivo (str): Caminho do arquivo Excel onde os 
+    nome_arquivo (str): Caminho do arquivo Excel onde os 
                 dados serão salvos.
     nome_aba (str): Nome da aba onde os dados serão adicionados ou 
                 criados. O nome padrão da aba é 'Dados'.
@@ -204,109 +544,392 @@ def salvar_dados_empresa_excel(resultados, nome_arquivo, nome_aba="Dados"):
                 diretamente no arquivo Excel especificado.
     """
     
-    # Utiliza o ExcelWriter para abrir o arquivo Excel especificado.
-    # O ExcelWriter é uma ferramenta do pandas que facilita a escrita de
-                # dados em múltiplos formatos de arquivo Excel sem
-                # destruir os dados existentes.
-    # Parâmetro 'engine' define que 'openpyxl' é usado como
-                # mecanismo para trabalhar com arquivos xlsx.
-    # Parâmetro 'mode' como 'a' permite anexar aos arquivos
-                # existentes sem apagar o conteúdo anterior.
-    # Parâmetro 'if_sheet_exists' como 'overlay' permite sobrepor dados na aba especificada se ela já existir.
-    with pd.ExcelWriter(nome_arquivo, engine='openpyxl', mode='a', if_sheet_exists='overlay') as writer:
+    try:
         
-        try:
-            
-            # Tenta acessar a aba com o nome especificado dentro do arquivo Excel.
-                        # Se a aba existir, 'worksheet' armazena essa aba.
-            worksheet = writer.book[nome_aba]
-            
-            # Determina a última linha preenchida na aba existente para
-                        # saber onde começar a adicionar novos dados.
-            start_row = worksheet.max_row
-            
-            # Adiciona os dados do DataFrame 'resultados' na aba existente,
-                        # começando após a última linha preenchida.
-            # 'index=False' significa que os índices do DataFrame não
-                        # serão escritos no Excel.
-            # 'header=False' significa que os cabeçalhos das colunas também
-                        # não serão escritos, pois se assume que a aba já possui cabeçalhos.
-            resultados.to_excel(writer, sheet_name=nome_aba, index=False, header=False, startrow=start_row)
-            
-        except KeyError:
-            
-            # Se a aba especificada não existir no arquivo, um erro de chave é capturado.
-            # Neste caso, cria-se uma nova aba com o nome especificado e
-                        # adiciona-se os dados com cabeçalhos de coluna.
-            resultados.to_excel(writer, sheet_name=nome_aba, index=False, header=True)
-            
-            # 'index=False' e 'header=True' significam que os dados serão
-                        # escritos sem índices, mas com cabeçalhos de coluna,
-                        # facilitando a identificação dos dados em uma nova aba.
+        # Lê, uma única vez, os dados já gravados na aba especificada,
+                    # tratando todas as colunas como texto para preservar
+                    # zeros à esquerda e a formatação original dos campos.
+        existentes = pd.read_excel(nome_arquivo, sheet_name=nome_aba, dtype=str)
+        
+        # Junta os dados existentes com os novos resultados, mantendo os
+                    # existentes primeiro, como em uma adição ao final da aba.
+        # 'ignore_index=True' renumera as linhas do DataFrame resultante.
+        resultados = pd.concat([existentes, resultados], ignore_index=True)
+        
+    except (FileNotFoundError, ValueError):
+        
+        # Se o arquivo ainda não existir (FileNotFoundError) ou se a aba
+                    # especificada não existir nele (ValueError), apenas os
+                    # novos resultados serão gravados.
+        pass
+    
+    # Grava todos os dados de uma só vez em um arquivo novo.
+    # Parâmetro 'engine' define que 'xlsxwriter' é usado como mecanismo de escrita,
+                # que é bem mais rápido que o 'openpyxl' para gerar arquivos xlsx.
+    # A opção 'constant_memory' do 'xlsxwriter' não é usada: o pandas grava as células
+                # coluna por coluna, e nesse modo o 'xlsxwriter' descarta as células
+                # de linhas que já foram gravadas no disco, perdendo dados.
+    # 'index=False' significa que os índices do DataFrame não
+                # serão escritos no Excel; os cabeçalhos de coluna são
+                # escritos, facilitando a identificação dos dados.
+    resultados.to_excel(nome_arquivo, sheet_name=nome_aba, index=False, engine='xlsxwriter')
+
+
+def salvar_dados_empresa_parquet(resultados, nome_diretorio):
+    
+    """
+    Esta função grava um DataFrame de dados das empresas em um 
+                conjunto de arquivos Parquet, pensado para uso em 
+                análises e processos automatizados.
+    Cada chamada adiciona um novo arquivo ao diretório, sem 
+                regravar os arquivos de execuções anteriores.
+
+    Parâmetros:
+    resultados (DataFrame): DataFrame contendo os dados das empresas a serem salvos.
+    nome_diretorio (str): Caminho do diretório onde os arquivos 
+                Parquet serão gravados. O diretório é criado se não existir.
+
+    Retorno:
+    None: A função não retorna nenhum valor, mas salva os dados 
+                diretamente no diretório especificado.
+    """
+    
+    # Converte o DataFrame em uma tabela do Arrow, sem incluir o índice do pandas.
+    tabela = pa.Table.from_pandas(resultados, preserve_index=False)
+    
+    # Grava a tabela como um novo arquivo dentro do diretório especificado.
+    # 'write_to_dataset' gera um nome de arquivo único a cada chamada, de modo
+                # que os dados de execuções anteriores são preservados e o
+                # diretório inteiro pode ser lido de uma vez com 'pd.read_parquet'.
+    # 'compression' como 'zstd' reduz o tamanho dos arquivos em disco.
+    pq.write_to_dataset(tabela, nome_diretorio, compression='zstd')
+
+
+def migrar_dados_legados(nome_planilha, nome_arquivo, nome_diretorio, nome_aba="Dados"):
+    
+    """
+    Esta função copia, uma única vez, os dados das empresas gravados por 
+                versões anteriores do programa na aba 'Dados' da própria 
+                planilha de entrada para os arquivos de resultados atuais.
+    Assim, os CNPJs já consultados nessas versões são reconhecidos como 
+                processados e não são consultados novamente na API.
+    A migração só acontece se a planilha de resultados ainda não existir.
+
+    Parâmetros:
+    nome_planilha (str): Caminho da planilha de entrada, que pode conter 
+                a aba de dados gravada por versões anteriores.
+    nome_arquivo (str): Caminho do arquivo Excel onde os dados das 
+                empresas são salvos atualmente.
+    nome_diretorio (str): Caminho do diretório onde os dados das 
+                empresas são salvos em formato Parquet.
+    nome_aba (str): Nome da aba que contém os dados das empresas. 
+                O nome padrão da aba é 'Dados'.
+
+    Retorno:
+    None: A função não retorna nenhum valor, mas grava os dados 
+                migrados nos arquivos de resultados.
+    """
+    
+    # Se a planilha de resultados já existir, a migração já foi feita
+                # (ou não era necessária) em uma execução anterior.
+    if os.path.exists(nome_arquivo):
+        return
+    
+    try:
+        
+        # Lê a aba de dados da planilha de entrada, tratando todas as colunas como
+                    # texto para preservar zeros à esquerda e a formatação dos campos.
+        legados = pd.read_excel(nome_planilha, sheet_name=nome_aba, dtype=str)
+        
+    except ValueError:
+        
+        # Se a planilha de entrada não tiver a aba de dados, não há nada a migrar.
+        return
+    
+    if legados.empty:
+        return
+    
+    # Garante as mesmas colunas, na mesma ordem, dos resultados atuais, e substitui
+                # células vazias por strings vazias, como faz 'formatar_dados'.
+    legados = legados.reindex(columns=CAMPOS_INTERESSE).fillna('')
+    
+    # Grava os dados migrados nos mesmos formatos usados para os novos resultados.
+    salvar_dados_empresa_excel(legados, nome_arquivo, nome_aba)
+    salvar_dados_empresa_parquet(legados, nome_diretorio)
+    
+    logger.info("%d empresas migradas da aba '%s' de '%s' para '%s'.", len(legados), nome_aba, nome_planilha, nome_arquivo)
+
+
+def carregar_cnpjs_processados(nome_arquivo, nome_aba="Dados"):
+    
+    """
+    Esta função lê os CNPJs que já constam na planilha de resultados, 
+                gravados por execuções anteriores, para que não sejam 
+                consultados novamente na API.
+
+    Parâmetros:
+    nome_arquivo (str): Caminho do arquivo Excel onde os dados 
+                das empresas são salvos.
+    nome_aba (str): Nome da aba que contém os dados das empresas. 
+                O nome padrão da aba é 'Dados'.
+
+    Retorna:
+    set: Conjunto com os CNPJs já processados, apenas com dígitos. 
+                Se o arquivo ou a aba não existirem, retorna um conjunto vazio.
+    """
+    
+    try:
+        
+        # Lê apenas a coluna 'cnpj' da aba de resultados, tratando-a como string
+                    # para preservar os zeros à esquerda.
+        existentes = pd.read_excel(nome_arquivo, sheet_name=nome_aba, usecols=['cnpj'], dtype={'cnpj': str})
+        
+    except (FileNotFoundError, ValueError):
+        
+        # Se o arquivo ainda não existir (FileNotFoundError) ou se a aba ou a coluna
+                    # não existirem nele (ValueError), nenhum CNPJ foi processado ainda.
+        return set()
+    
+    # O campo 'cnpj' retornado pela API vem formatado com pontos, barra e traço,
+                # por isso é limpo para ser comparado com os CNPJs da planilha de entrada.
+    return {limpar_cnpj(cnpj) for cnpj in existentes['cnpj'].dropna()}
+
+
+def carregar_checkpoint(nome_arquivo):
+    
+    """
+    Esta função lê o arquivo de resultados parciais (checkpoint) gravado 
+                durante uma execução anterior que foi interrompida antes 
+                de salvar os dados na planilha.
+    Cada linha do arquivo contém, em formato JSON, os dados formatados 
+                de uma empresa, como retornados por 'formatar_dados'.
+
+    Parâmetros:
+    nome_arquivo (str): Caminho do arquivo de resultados parciais, 
+                no formato JSON Lines (um objeto JSON por linha).
+
+    Retorna:
+    dict: Dicionário que associa cada CNPJ, apenas com dígitos, aos 
+                dados formatados da empresa. Se o arquivo não existir, 
+                retorna um dicionário vazio.
+    """
+    
+    # Inicializa o dicionário que armazenará os dados já obtidos, indexados pelo CNPJ.
+    dados = {}
+    
+    try:
+        
+        # Abre o arquivo em modo binário, pois 'orjson.loads' aceita bytes diretamente.
+        with open(nome_arquivo, 'rb') as arquivo:
             
+            for linha in arquivo:
+                
+                # Tenta decodificar a linha como um objeto JSON.
+                # Uma linha incompleta, gravada no momento em que a execução anterior
+                            # foi interrompida, é simplesmente ignorada.
+                try:
+                    registro = orjson.loads(linha)
+                except orjson.JSONDecodeError:
+                    continue
+                
+                # O campo 'cnpj' retornado pela API vem formatado com pontos, barra e traço,
+                            # por isso é limpo para ser comparado com os CNPJs da planilha.
+                dados[limpar_cnpj(registro['cnpj'])] = registro
+                
+    except FileNotFoundError:
+        
+        # Se o arquivo não existir, a execução anterior terminou normalmente
+                    # (ou esta é a primeira execução), e não há dados a recuperar.
+        pass
+    
+    # Retorna os dados recuperados do arquivo de resultados parciais.
+    return dados
 
-# Define o caminho do arquivo Excel onde os dados serão salvos.
+
+# Configura o registro de mensagens para exibir avisos e informações no terminal.
+# Para acompanhar o status de cada consulta, basta trocar o nível para 'logging.DEBUG'.
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+# Define o caminho do arquivo Excel de onde os CNPJs serão lidos.
 caminho_planilha = "CNPJ.xlsx"
 
+# Define o caminho do arquivo Excel onde os dados serão salvos.
+# Os resultados ficam em um arquivo separado para que a planilha de entrada
+        # não precise ser regravada a cada execução.
+caminho_saida = "CNPJ_out.xlsx"
+
+# Define o caminho do diretório onde os dados também serão salvos em formato Parquet.
+caminho_saida_parquet = "CNPJ_parquet"
+
+# Define o caminho do arquivo onde os resultados são gravados à medida que são obtidos.
+# Se a execução for interrompida (falha de rede, bloqueio da API, Ctrl+C), os
+        # CNPJs já consultados são recuperados deste arquivo na próxima execução,
+        # em vez de serem consultados novamente.
+# O arquivo é removido depois que os dados são salvos na planilha.
+caminho_checkpoint = "resultados_parciais.jsonl"
+
 # Carrega os dados de CNPJs da planilha, tratando a coluna CNPJ como string
         # para evitar perda de dígitos.
 # A função 'read_excel' do pandas é usada para ler dados de uma planilha Excel.
 # 'caminho_planilha' especifica o caminho do arquivo Excel que contém os dados.
 # 'sheet_name' especifica a aba dentro do arquivo Excel de onde os dados devem ser lidos.
+# 'usecols' restringe a leitura à coluna 'CNPJ', a única usada pelo processamento,
+            # evitando converter e armazenar as demais colunas da aba.
 # 'dtype' especifica o tipo de dados de cada coluna; aqui, a coluna 'CNPJ' é tratada como string (str)
             # para preservar os zeros à esquerda e outros formatos numéricos que poderiam ser
 # interpretados incorretamente como números inteiros.
-planilha_cnpjs = pd.read_excel(caminho_planilha, sheet_name='CNPJ', dtype={'CNPJ': str})
+planilha_cnpjs = pd.read_excel(caminho_planilha, sheet_name='CNPJ', usecols=['CNPJ'], dtype={'CNPJ': str})
 
-# Inicializa uma lista vazia para armazenar os resultados formatados de
-            # cada empresa consultada.
-resultados = []
+# Limpa toda a coluna 'CNPJ' de uma só vez, em vez de chamar 'limpar_cnpj' para cada linha.
+# 'str.replace' com a expressão regular '_NAO_DIGITO' remove todos os caracteres que não são
+            # dígitos numéricos, como pontos, traços e barras.
+# Valores que ficam vazios após a limpeza são convertidos em NA, para que sejam
+            # descartados pelo 'dropna()' mais adiante.
+# 'str.zfill(14)' completa com zeros à esquerda os CNPJs que perderam esses zeros,
+            # por exemplo quando a célula foi digitada como número no Excel.
+planilha_cnpjs['CNPJ'] = (
+    planilha_cnpjs['CNPJ']
+    .str.replace(_NAO_DIGITO, '', regex=True)
+    .replace('', pd.NA)
+    .str.zfill(14)
+)
 
-# Itera sobre os CNPJs da planilha, obtendo e formatando os dados de cada empresa.
+# Converte a coluna 'CNPJ' em uma lista Python antes de percorrê-la, evitando a
+            # sobrecarga de iterar diretamente sobre uma Series do pandas.
 # 'dropna()' é usado para eliminar quaisquer valores NaN que possam existir na
             # coluna 'CNPJ', garantindo que apenas CNPJs válidos sejam processados.
-for cnpj in planilha_cnpjs['CNPJ'].dropna():
+cnpjs = planilha_cnpjs['CNPJ'].dropna().tolist()
+
+# Copia para a planilha de resultados os dados gravados por versões anteriores
+            # do programa na aba 'Dados' da planilha de entrada, se ainda não foram copiados.
+migrar_dados_legados(caminho_planilha, caminho_saida, caminho_saida_parquet)
+
+# Carrega os CNPJs que já constam na planilha de resultados, gravados por
+            # execuções anteriores, para que não sejam consultados novamente.
+cnpjs_processados = carregar_cnpjs_processados(caminho_saida)
+
+# Recupera os resultados gravados por uma execução anterior que foi interrompida.
+dados_checkpoint = carregar_checkpoint(caminho_checkpoint)
+
+# Organiza os resultados por coluna: um dicionário com uma lista para cada campo
+            # de 'CAMPOS_INTERESSE', preenchidas à medida que os dados são obtidos.
+# Assim, o DataFrame é montado diretamente a partir das listas, sem precisar
+            # transpor uma lista de dicionários (uma linha por empresa) em colunas.
+resultados = {campo: [] for campo in CAMPOS_INTERESSE}
+
+# Lista com a posição original na planilha de cada empresa adicionada a 'resultados',
+            # já que as consultas terminam fora de ordem.
+posicoes = []
+
+# Consulta os CNPJs da planilha em paralelo, obtendo e formatando os dados de cada empresa.
+# Como o tempo de cada consulta é quase todo de espera pela rede, várias threads
+            # podem aguardar respostas ao mesmo tempo, compartilhando a sessão 'SESSION'.
+# O arquivo de resultados parciais é aberto em modo de adição ('ab'), para que os
+            # resultados recuperados de uma execução anterior sejam preservados.
+# 'logging_redirect_tqdm' faz com que os avisos registrados durante as consultas
+            # sejam exibidos acima da barra de progresso, sem desorganizá-la.
+with open(caminho_checkpoint, 'ab') as checkpoint, \
+        ThreadPoolExecutor(max_workers=MAX_REQUISICOES_SIMULTANEAS) as executor, \
+        logging_redirect_tqdm():
     
-    # Imprime o CNPJ atual sendo processado para fins de depuração e
-            # acompanhamento do progresso.
-    print(f"Lendo CNPJ: {cnpj}")
+    # O dicionário 'futuros' associa cada tarefa agendada à posição do CNPJ na
+            # planilha, para que os resultados possam ser reordenados ao final.
+    futuros = {}
     
-    # Chama a função 'obter_dados_empresa_por_cnpj' para cada CNPJ,
-            # convertendo o CNPJ para string por precaução,
-            # embora já esteja definido como string pelo 'dtype' na leitura da planilha.
-    dados_empresa = obter_dados_empresa_por_cnpj(str(cnpj))
+    for posicao, cnpj in enumerate(cnpjs):
+        
+        # Se o CNPJ for inválido (tamanho ou dígitos verificadores incorretos), ele é
+                    # ignorado, evitando uma requisição à API que certamente falharia.
+        if not cnpj_valido(cnpj):
+            logger.warning("CNPJ inválido ignorado: %s", cnpj)
+            continue
+        
+        # Se o CNPJ já consta na planilha de resultados, ele é ignorado.
+        # Esta verificação vem antes da do arquivo de resultados parciais para que
+                    # dados já salvos na planilha não sejam adicionados novamente.
+        if cnpj in cnpjs_processados:
+            continue
+        
+        # Se o CNPJ já foi consultado em uma execução interrompida, reutiliza os
+                    # dados recuperados do arquivo de resultados parciais.
+        if cnpj in dados_checkpoint:
+            adicionar_resultado(resultados, posicoes, posicao, dados_checkpoint[cnpj])
+            continue
+        
+        # Caso contrário, agenda uma chamada a 'obter_dados_empresa_por_cnpj'.
+        # Não é necessário converter o CNPJ para string, pois ele já foi lido como
+                    # string pelo 'dtype' na leitura da planilha e limpo em seguida.
+        futuros[executor.submit(obter_dados_empresa_por_cnpj, cnpj)] = posicao
     
-    # Verifica se dados válidos foram retornados (i.e., 'dados_empresa' não é None).
-    if dados_empresa:
+    try:
         
-        # Se dados válidos foram obtidos, chama a função 'formatar_dados' para
-                    # estruturar os dados em um formato mais simples e uniforme.
-        dados_formatados = formatar_dados(dados_empresa)
+        # Percorre as tarefas à medida que são concluídas, independentemente da
+                # ordem em que foram agendadas.
+        # 'tqdm' exibe uma única barra de progresso, atualizada a cada consulta concluída,
+                # no lugar de uma mensagem impressa por CNPJ.
+        for futuro in tqdm(as_completed(futuros), total=len(futuros), desc="Consultando CNPJs", unit="CNPJ"):
         
-        # Adiciona os dados formatados à lista 'resultados'.
-        resultados.append(dados_formatados)
-
+            # Obtém o resultado da consulta feita pela thread.
+            dados_empresa = futuro.result()
+        
+            # Verifica se dados válidos foram retornados (i.e., 'dados_empresa' não é None).
+            if dados_empresa:
+            
+                # Se dados válidos foram obtidos, chama a função 'formatar_dados' para
+                            # estruturar os dados em um formato mais simples e uniforme.
+                dados_formatados = formatar_dados(dados_empresa)
+            
+                # Grava imediatamente os dados formatados como uma linha JSON no arquivo de
+                            # resultados parciais. 'flush' garante que a linha chegue ao
+                            # disco mesmo que a execução seja interrompida logo em seguida.
+                checkpoint.write(orjson.dumps(dados_formatados) + b'\n')
+                checkpoint.flush()
+            
+                adicionar_resultado(resultados, posicoes, futuros[futuro], dados_formatados)
+    
+    except BaseException:
+        
+        # Se a execução for interrompida (por exemplo, com Ctrl+C) ou ocorrer um erro
+                    # inesperado, as consultas ainda na fila são canceladas, em vez de
+                    # aguardar que todas terminem ao sair do bloco 'with'.
+        # O evento 'ENCERRANDO' libera as threads que aguardam a vez na API, para que
+                    # terminem imediatamente. Os resultados já obtidos estão gravados
+                    # no arquivo de resultados parciais e serão recuperados na próxima execução.
+        ENCERRANDO.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
 
-# Verifica se a lista 'resultados' contém algum dicionário de dados formatados.
-# 'resultados' é preenchida com dicionários se dados válidos foram
+# Verifica se alguma empresa foi adicionada a 'resultados'.
+# As listas de 'resultados' são preenchidas se dados válidos foram
             # obtidos e formatados nas etapas anteriores.
-if resultados:
+if posicoes:
     
-    # Converte a lista de dicionários 'resultados' em um DataFrame do pandas.
+    # Converte o dicionário de listas 'resultados' em um DataFrame do pandas.
     # Um DataFrame é uma estrutura de dados tabular muito usada em análise de
             # dados que facilita a manipulação, análise e visualização.
-    # Cada dicionário na lista 'resultados' se torna uma linha no DataFrame, e
-            # as chaves dos dicionários se tornam as colunas.
-    resultados_df = pd.DataFrame(resultados)
+    # Cada lista de 'resultados' se torna uma coluna do DataFrame, na ordem de 'CAMPOS_INTERESSE'.
+    # As posições originais servem de índice, e 'sort_index' devolve as empresas à
+            # mesma ordem em que os CNPJs aparecem na planilha.
+    resultados_df = pd.DataFrame(resultados, index=posicoes).sort_index(kind='stable')
     
     # Chama a função 'salvar_dados_empresa_excel' para gravar o
             # DataFrame 'resultados_df' no arquivo Excel especificado.
-    # 'caminho_planilha' é o caminho do arquivo onde os dados serão salvos.
+    # 'caminho_saida' é o caminho do arquivo onde os dados serão salvos.
     # A função é responsável por adicionar os dados em uma aba específica
             # ou criar uma nova se necessário,
     # garantindo que os dados sejam persistidos de forma organizada e acessível.
-    salvar_dados_empresa_excel(resultados_df, caminho_planilha)
+    salvar_dados_empresa_excel(resultados_df, caminho_saida)
+    
+    # Chama a função 'salvar_dados_empresa_parquet' para gravar os mesmos dados
+            # em formato Parquet, mais adequado para uso posterior em análises.
+    # A planilha Excel continua sendo gerada para consulta humana.
+    salvar_dados_empresa_parquet(resultados_df, caminho_saida_parquet)
+
+# Com os dados já salvos na planilha, o arquivo de resultados parciais não é
+            # mais necessário e é removido; na próxima execução, os CNPJs
+            # processados são reconhecidos pela própria planilha de resultados.
+os.remove(caminho_checkpoint)
 
 # Após tentar salvar os dados, imprime uma mensagem indicando que os dados
             # das empresas foram salvos na planilha.
-print("Dados das empresas foram salvos na planilha na aba 'Dados'.")
+print(f"Dados das empresas foram salvos na planilha '{caminho_saida}' na aba 'Dados' e em '{caminho_saida_parquet}'.")